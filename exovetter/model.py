@@ -107,19 +107,13 @@ def create_box_model(times, period, epoch, duration, depth):
     # Make epoch the start of the transit, not the midpoint
     epoch -= duration * 0.5
 
-    mnT = np.min(times)
-    mxT = np.max(times)
+    # Phase relative to the start of the nearest preceding transit.
+    # In-transit points satisfy phase <= duration. This is O(N)
+    # regardless of the number of transits, unlike looping over epochs.
+    rel = times - epoch
+    phase = rel - np.floor(rel / period) * period
 
-    e0 = int(np.floor((mnT - epoch) / period))
-    e1 = int(np.floor((mxT - epoch) / period))
-
-    flux = np.zeros_like(times)
     depth_values = depth.to_value()
-    for i in range(e0, e1 + 1):
-        t0 = period * i + epoch
-        t1 = t0 + duration
-
-        idx = (t0 <= times) & (times <= t1)
-        flux[idx] -= depth_values
+    flux = np.where(phase <= duration, -depth_values, 0.0)
 
     return flux * depth.unit
@@ -1,5 +1,6 @@
 """Module to handle exoplanet vetters."""
 
+import concurrent.futures
 import pprint
 from abc import ABC, abstractmethod
 
@@ -24,6 +25,20 @@ __all__ = ['BaseVetter', 'ModShift', 'Lpp', 'OddEven',
            'TransitPhaseCoverage', 'Sweet', 'Centroid',
            'VizTransits', 'LeoVetter']
 
+# Vetter instance held by each run_many worker process, set once by
+# _init_worker when the process starts
+_worker_vetter = None
+
+
+def _init_worker(vetter):
+    global _worker_vetter
+    _worker_vetter = vetter
+
+
+def _run_in_worker(tce, lightcurve):
+    return _worker_vetter.run(tce, lightcurve)
+
+
 class BaseVetter(ABC):
     """Base class for vetters.
 
@@ -78,6 +93,40 @@ class BaseVetter(ABC):
         """
         pass
 
+    def run_many(self, tces, lightcurves, n_workers=None):
+        """Run this vetter on many TCEs in parallel.
+
+        Vetting one TCE is independent of every other, so a batch is
+        farmed out to a process pool, one TCE/lightcurve pair per task.
+        The vetter is shipped to each worker process once, through the
+        pool's initializer, so expensive state built in ``__init__``
+        (e.g., the LPP map) is not re-pickled for every TCE. Attributes
+        populated by :meth:`run` stay in the workers and are not
+        propagated back; only the metrics are returned.
+
+        Parameters
+        ----------
+        tces : list of `~exovetter.tce.Tce`
+            TCEs to vet.
+
+        lightcurves : list
+            ``lightkurve`` objects, one per TCE.
+
+        n_workers : int or `None`
+            Number of worker processes. Default (`None`) uses one per
+            CPU.
+
+        Returns
+        -------
+        results : list of dict
+            Metric dictionary for each TCE, in input order.
+
+        """
+        with concurrent.futures.ProcessPoolExecutor(
+                max_workers=n_workers, initializer=_init_worker,
+                initargs=(self,)) as pool:
+            return list(pool.map(_run_in_worker, tces, lightcurves))
+
     def plot(self, tce, lightcurve):
         """Generate a diagnostic plot.
 
@@ -123,6 +172,10 @@ class ModShift(BaseVetter):
         box : astropy.units.Quantity object
             Flux from boxcar model of the TCE, populated by :meth:`run`.
 
+        conv : array
+            Convolution of the folded lightcurve with the model,
+            populated by :meth:`run`.
+
         metrics : dict
             modshift result dictionary populated by :meth:`run`.
         """
@@ -134,6 +187,7 @@ class ModShift(BaseVetter):
         self.epoch_days = None
         self.duration_hrs = None
         self.box = None
+        self.conv = None
         self.metrics = None
 
     def run(self, tce, lightcurve, plot=False):
@@ -177,7 +231,7 @@ class ModShift(BaseVetter):
         self.duration_hrs = tce["duration"].to_value(u.hour)
 
         self.box = model.create_box_model_for_tce(tce, self.time * u.day, time_offset_q)
-        self.metrics, conv = modshift.compute_modshift_metrics(
+        self.metrics, self.conv = modshift.compute_modshift_metrics(
             self.time,
             self.flux,
             self.box,
@@ -189,16 +243,17 @@ class ModShift(BaseVetter):
 
         return self.metrics
 
-    def plot(self):
-        met, c = modshift.compute_modshift_metrics(
-            self.time,
-            self.flux,
-            self.box,
-            self.period_days,
-            self.epoch_days,
-            self.duration_hrs,
-            show_plot=True,
-        )
+    def plot(self):  # pragma: no cover
+        if self.metrics is None:
+            raise ValueError(
+                "Modshift metrics are empty. Execute self.run(...) first.")
+
+        # Render from the arrays cached by run() rather than redoing
+        # the fold/bin/convolve; only the phase is recomputed.
+        phi_days = modshift.compute_phase(
+            self.time, self.period_days, self.epoch_days)
+        modshift.plot_modshift(phi_days, self.period_days, self.flux,
+                               self.box, self.conv, self.metrics)
 
 
 class Lpp(BaseVetter):
@@ -78,14 +78,15 @@ def test_fold_and_bin_data():
     y = np.random.randn(100)
 
     data = modshift.fold_and_bin_data(x, y, 100, 0, 500)
-    assert len(data) == len(x), len(data)
+    assert len(data.phase) == len(x), len(data.phase)
 
     data = modshift.fold_and_bin_data(x, y, 100, 44, 500)
-    assert len(data) == len(x), len(data)
+    assert len(data.phase) == len(x), len(data.phase)
 
-    # idebug()
     data = modshift.fold_and_bin_data(x, y, 100, 44, 100)
-    assert len(data) == len(x), len(data)
+    assert len(data.phase) == len(x), len(data.phase)
+    assert len(data.flux) == len(data.phase)
+    assert len(data.counts) == len(data.phase)
 
 
 def test_convolve():
@@ -72,6 +72,28 @@ def test_vetters():
         assert isinstance(results[k], dict)
 
 
+def test_run_many():
+
+    tce1 = get_wasp18_tce()
+    tce2 = get_wasp18_tce()
+    tce2["period"] = 2 * tce1["period"]
+    lc = get_wasp18_lightcurve()
+
+    vetter = vetters.TransitPhaseCoverage()
+    expected1 = vetter.run(tce1, lc)
+    expected2 = vetter.run(tce2, lc)
+
+    results = vetter.run_many([tce1, tce2], [lc, lc], n_workers=2)
+
+    assert len(results) == 2
+
+    # Results come back in input order
+    assert np.isclose(results[0]["transit_phase_coverage"],
+                      expected1["transit_phase_coverage"])
+    assert np.isclose(results[1]["transit_phase_coverage"],
+                      expected2["transit_phase_coverage"])
+
+
 def test_cent_vetter():
 
     tce = get_wasp18_tce()